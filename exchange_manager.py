@@ -1,8 +1,12 @@
+import asyncio
+import itertools
 import math
+import random
 import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import ccxt  # type: ignore
+import ccxt.async_support as ccxt_async  # type: ignore
 
 from logger import log_event
 
@@ -17,14 +21,27 @@ class ExchangeManager:
         self.paper = config.get("paper_trading", True)
         self.retry_attempts = 3
         self.backoff_base = 2
+        self.max_backoff_seconds = 30
+        self.rate_limit_cooloff_seconds = 60
         self.exchange_id = config.get("exchange", "binance")
         self.client = self._init_client()
+        # Bound-method snapshots: skips the descriptor lookup that
+        # rebuilds a method object on every self.client.<name> access.
+        self._fetch_ohlcv = self.client.fetch_ohlcv
+        self._fetch_ticker = self.client.fetch_ticker
+        self._fetch_tickers = self.client.fetch_tickers
+        self._fetch_balance = self.client.fetch_balance
+        self._create_order = self.client.create_order
+        self._cancel_order = self.client.cancel_order
+        self._paper_order_seq = itertools.count()
+        self._base_rate_limit = getattr(self.client, "rateLimit", None)
+        self._rate_limit_cooloff_until = 0.0
 
         if self.paper and self.position_manager is not None and self.position_manager.paper_balance == 0.0:
             self.position_manager.paper_balance = float(config.get("starting_balance", 10000.0))
 
     def _init_client(self):
-        exchange_class = getattr(ccxt, self.exchange_id)
+        exchange_class = getattr(ccxt_async, self.exchange_id)
         params: Dict[str, Any] = {"enableRateLimit": True, "options": self.config.get("exchange_params", {})}
         if not self.paper:
             params.update({"apiKey": self.config.get("api_key"), "secret": self.config.get("api_secret")})
@@ -34,44 +51,106 @@ class ExchangeManager:
                 client.set_sandbox_mode(True)
             except Exception:
                 pass
+        self._min_sizes: Dict[str, Optional[float]] = {}
+        return client
+
+    async def load_markets(self) -> None:
         try:
-            client.load_markets()
+            await self.client.load_markets()
+            self._min_sizes = {
+                sym: market.get("limits", {}).get("amount", {}).get("min")
+                for sym, market in (self.client.markets or {}).items()
+            }
         except Exception as exc:
             log_event(self.logger, "ERROR", "Failed to load markets", {"error": str(exc)})
-        return client
 
-    def _call_with_retries(self, func, *args, **kwargs):
+    async def close(self) -> None:
+        try:
+            await self.client.close()
+        except Exception:
+            pass
+
+    def _backoff_delay(self, attempt: int) -> float:
+        # Full jitter: spread retries of concurrent callers over
+        # [0.5x, 1.5x] of the capped exponent so they do not wake in
+        # lockstep and re-trigger the rate limit together.
+        return min(self.backoff_base ** attempt, self.max_backoff_seconds) * (0.5 + random.random())
+
+    def _rate_limit_delay(self, attempt: int) -> float:
+        headers = getattr(self.client, "last_response_headers", None) or {}
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except (TypeError, ValueError):
+                pass
+        reset = headers.get("X-RateLimit-Reset")
+        if reset is not None:
+            try:
+                return max(0.0, float(reset) / 1000.0 - time.time())
+            except (TypeError, ValueError):
+                pass
+        return self._backoff_delay(attempt)
+
+    async def _call_with_retries(self, func, *args, **kwargs):
+        if self._rate_limit_cooloff_until and time.time() >= self._rate_limit_cooloff_until:
+            if self._base_rate_limit:
+                self.client.rateLimit = self._base_rate_limit
+            self._rate_limit_cooloff_until = 0.0
+
+        rate_limit_hits = 0
         for attempt in range(self.retry_attempts):
             try:
-                return func(*args, **kwargs)
+                return await func(*args, **kwargs)
             except ccxt.RateLimitExceeded as exc:
-                delay = self.backoff_base ** attempt
+                rate_limit_hits += 1
+                delay = self._rate_limit_delay(attempt)
+                if rate_limit_hits >= 2 and self._base_rate_limit:
+                    self.client.rateLimit = int(self.client.rateLimit * 1.2)
+                    self._rate_limit_cooloff_until = time.time() + self.rate_limit_cooloff_seconds
                 log_event(self.logger, "WARN", "Rate limit hit, backing off", {"delay": delay, "error": str(exc)})
-                time.sleep(delay)
+                await asyncio.sleep(delay)
             except ccxt.NetworkError as exc:
-                delay = self.backoff_base ** attempt
+                delay = self._backoff_delay(attempt)
                 log_event(self.logger, "WARN", "Network error, retrying", {"delay": delay, "error": str(exc)})
-                time.sleep(delay)
+                await asyncio.sleep(delay)
         raise RuntimeError("Max retries exceeded for exchange call")
 
-    def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int):
-        return self._call_with_retries(self.client.fetch_ohlcv, symbol, timeframe, limit=limit)
+    async def fetch_ohlcv(self, symbol: str, timeframe: str, limit: int):
+        return await self._call_with_retries(self._fetch_ohlcv, symbol, timeframe, limit=limit)
 
-    def fetch_price(self, symbol: str) -> Optional[float]:
+    async def fetch_price(self, symbol: str) -> Optional[float]:
         try:
-            ticker = self._call_with_retries(self.client.fetch_ticker, symbol)
+            ticker = await self._call_with_retries(self._fetch_ticker, symbol)
             return ticker.get("last") or ticker.get("close")
         except Exception as exc:
             log_event(self.logger, "ERROR", "Failed to fetch ticker", {"symbol": symbol, "error": str(exc)})
             return None
 
-    def fetch_balance(self) -> float:
+    async def fetch_tickers(self, symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not symbols:
+            return {}
+        if self.client.has.get("fetchTickers"):
+            try:
+                return await self._call_with_retries(self._fetch_tickers, symbols)
+            except Exception as exc:
+                log_event(self.logger, "ERROR", "Failed to fetch tickers", {"symbols": symbols, "error": str(exc)})
+                return {}
+        tickers: Dict[str, Dict[str, Any]] = {}
+        for symbol in symbols:
+            try:
+                tickers[symbol] = await self._call_with_retries(self._fetch_ticker, symbol)
+            except Exception as exc:
+                log_event(self.logger, "ERROR", "Failed to fetch ticker", {"symbol": symbol, "error": str(exc)})
+        return tickers
+
+    async def fetch_balance(self) -> float:
         if self.paper:
             if self.position_manager is None:
                 return float(self.config.get("starting_balance", 10000.0))
             return float(self.position_manager.paper_balance)
         try:
-            balance = self._call_with_retries(self.client.fetch_balance)
+            balance = await self._call_with_retries(self._fetch_balance)
             total = balance.get("total") or balance.get("free") or {}
             usdt = total.get("USDT") or total.get("USD")
             return float(usdt) if usdt is not None else 0.0
@@ -79,36 +158,37 @@ class ExchangeManager:
             log_event(self.logger, "ERROR", "Failed to fetch balance", {"error": str(exc)})
             return 0.0
 
-    def create_market_order(self, symbol: str, side: str, amount: float) -> Dict[str, Any]:
+    async def create_market_order(self, symbol: str, side: str, amount: float) -> Dict[str, Any]:
         if self.paper:
-            price = self.fetch_price(symbol)
+            price = await self.fetch_price(symbol)
             if price is None:
                 raise RuntimeError("Price unavailable for paper order")
             cost = price * amount
-            if self.position_manager is not None and cost > self.position_manager.paper_balance:
-                raise RuntimeError("Insufficient paper balance")
             if self.position_manager is not None:
-                self.position_manager.paper_balance -= cost
+                with self.position_manager.lock:
+                    if cost > self.position_manager.paper_balance:
+                        raise RuntimeError("Insufficient paper balance")
+                    self.position_manager.paper_balance -= cost
             order = {
-                "id": f"paper-{int(time.time() * 1000)}",
+                "id": f"paper-{next(self._paper_order_seq)}",
                 "symbol": symbol,
                 "side": side,
                 "amount": amount,
                 "price": price,
-                "timestamp": int(time.time() * 1000),
+                "timestamp": time.time_ns() // 1_000_000,
                 "status": "closed",
             }
             log_event(self.logger, "INFO", "Paper market order executed", order)
             return order
 
-        order = self._call_with_retries(self.client.create_order, symbol, "market", side, amount)
+        order = await self._call_with_retries(self._create_order, symbol, "market", side, amount)
         log_event(self.logger, "INFO", "Live market order sent", {"id": order.get("id"), "symbol": symbol, "side": side, "amount": amount})
         return order
 
-    def create_stop_order(self, symbol: str, side: str, amount: float, stop_price: float) -> Dict[str, Any]:
+    async def create_stop_order(self, symbol: str, side: str, amount: float, stop_price: float) -> Dict[str, Any]:
         if self.paper:
             order = {
-                "id": f"paper-sl-{int(time.time() * 1000)}",
+                "id": f"paper-sl-{next(self._paper_order_seq)}",
                 "symbol": symbol,
                 "side": side,
                 "amount": amount,
@@ -119,16 +199,16 @@ class ExchangeManager:
 
         params = {"stopPrice": stop_price}
         try:
-            order = self._call_with_retries(self.client.create_order, symbol, "stop", side, amount, stop_price, params)
+            order = await self._call_with_retries(self._create_order, symbol, "stop", side, amount, stop_price, params)
         except Exception:
-            order = self._call_with_retries(self.client.create_order, symbol, "stop_market", side, amount, None, params)
+            order = await self._call_with_retries(self._create_order, symbol, "stop_market", side, amount, None, params)
         log_event(self.logger, "INFO", "Live stop order sent", {"id": order.get("id"), "stop": stop_price})
         return order
 
-    def create_take_profit_order(self, symbol: str, side: str, amount: float, price: float) -> Dict[str, Any]:
+    async def create_take_profit_order(self, symbol: str, side: str, amount: float, price: float) -> Dict[str, Any]:
         if self.paper:
             order = {
-                "id": f"paper-tp-{int(time.time() * 1000)}",
+                "id": f"paper-tp-{next(self._paper_order_seq)}",
                 "symbol": symbol,
                 "side": side,
                 "amount": amount,
@@ -137,13 +217,37 @@ class ExchangeManager:
             log_event(self.logger, "INFO", "Paper take-profit order recorded", order)
             return order
 
-        order = self._call_with_retries(self.client.create_order, symbol, "limit", side, amount, price)
+        order = await self._call_with_retries(self._create_order, symbol, "limit", side, amount, price)
         log_event(self.logger, "INFO", "Live take-profit order sent", {"id": order.get("id"), "price": price})
         return order
 
-    def minimum_order_size(self, symbol: str) -> Optional[float]:
+    async def cancel_order(self, order_id: Optional[str], symbol: str) -> None:
+        if order_id is None or self.paper:
+            return
         try:
-            market = self.client.market(symbol)
-            return market.get("limits", {}).get("amount", {}).get("min")
-        except Exception:
-            return None
+            await self._call_with_retries(self._cancel_order, order_id, symbol)
+            log_event(self.logger, "INFO", "Order cancelled", {"id": order_id, "symbol": symbol})
+        except Exception as exc:
+            log_event(self.logger, "ERROR", "Failed to cancel order", {"id": order_id, "symbol": symbol, "error": str(exc)})
+
+    def supports_bracket_orders(self) -> bool:
+        return not self.paper and bool(self.client.has.get("createOrderWithTakeProfitAndStopLoss"))
+
+    async def create_bracket_order(
+        self, symbol: str, side: str, amount: float, stop_price: float, take_profit_price: float
+    ) -> Dict[str, Any]:
+        params = {
+            "stopLoss": {"triggerPrice": stop_price},
+            "takeProfit": {"triggerPrice": take_profit_price},
+        }
+        order = await self._call_with_retries(self._create_order, symbol, "market", side, amount, None, params)
+        log_event(
+            self.logger,
+            "INFO",
+            "Live bracket order sent",
+            {"id": order.get("id"), "symbol": symbol, "side": side, "amount": amount, "stop": stop_price, "take_profit": take_profit_price},
+        )
+        return order
+
+    def minimum_order_size(self, symbol: str) -> Optional[float]:
+        return self._min_sizes.get(symbol)
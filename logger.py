@@ -1,9 +1,14 @@
-import json
 import logging
 import sys
+import time
 from datetime import datetime
 from typing import Any, Dict, Optional
 
+import orjson
+
+_last_sec = 0
+_last_str = ""
+
 
 def setup_logging(level: str = "INFO") -> logging.Logger:
     logger = logging.getLogger("quant-bot")
@@ -19,9 +24,22 @@ def setup_logging(level: str = "INFO") -> logging.Logger:
     return logger
 
 
+def _timestamp() -> str:
+    # Re-render the second-resolution prefix only when the epoch second
+    # changes; log_event runs for every order/signal and the full
+    # strftime dominates otherwise.
+    global _last_sec, _last_str
+    t = time.time()
+    sec = int(t)
+    if sec != _last_sec:
+        _last_str = datetime.utcfromtimestamp(sec).strftime("%Y-%m-%dT%H:%M:%S")
+        _last_sec = sec
+    return f"{_last_str}.{int((t - sec) * 1e6):06d}Z"
+
+
 def log_event(logger: logging.Logger, level: str, message: str, data: Optional[Dict[str, Any]] = None) -> None:
     payload = {
-        "ts": datetime.utcnow().isoformat() + "Z",
+        "ts": _timestamp(),
         "level": level.upper(),
         "msg": message,
     }
@@ -29,4 +47,4 @@ def log_event(logger: logging.Logger, level: str, message: str, data: Optional[D
         payload["data"] = data
 
     log_method = getattr(logger, level.lower(), logger.info)
-    log_method(json.dumps(payload, default=str))
+    log_method(orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode())
@@ -1,11 +1,15 @@
 import argparse
+import asyncio
 import json
 import math
+import multiprocessing
 import os
 import time
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
 from dotenv import load_dotenv
 
 from exchange_manager import ExchangeManager
@@ -15,10 +19,12 @@ from strategy import (
     calculate_macd,
     calculate_position_size,
     check_entry_trigger,
+    detect_all_fvgs,
     detect_fvg,
     execute_trade,
     fetch_ohlcv_data,
     manage_positions,
+    to_arrays,
 )
 
 
@@ -27,20 +33,22 @@ def load_config(path: str) -> Dict[str, Any]:
         return json.load(handle)
 
 
-def wait_for_next_close(buffer_seconds: int = 30) -> None:
-    interval = 4 * 60 * 60
+CYCLE_INTERVAL_SECONDS = 4 * 60 * 60
+
+
+def seconds_until_next_close(buffer_seconds: int = 30) -> float:
     now = time.time()
-    next_close = (math.floor(now / interval) + 1) * interval
-    wait_seconds = max(0, next_close - now + buffer_seconds)
-    time.sleep(wait_seconds)
+    next_close = (math.floor(now / CYCLE_INTERVAL_SECONDS) + 1) * CYCLE_INTERVAL_SECONDS
+    return max(0.0, next_close - now + buffer_seconds)
 
 
-def process_symbol(
+async def process_symbol(
     symbol: str,
     config: Dict[str, Any],
     exchange: ExchangeManager,
     position_manager: PositionManager,
     logger,
+    balance: Optional[float] = None,
 ) -> None:
     timeframe = config.get("timeframe", "4h")
     limit = config.get("ohlcv_limit", 200)
@@ -54,7 +62,7 @@ def process_symbol(
         return
 
     try:
-        df = fetch_ohlcv_data(exchange, symbol, timeframe, limit)
+        df = await fetch_ohlcv_data(exchange, symbol, timeframe, limit)
     except Exception as exc:
         log_event(logger, "ERROR", "Failed to fetch OHLCV", {"symbol": symbol, "error": str(exc)})
         return
@@ -95,7 +103,8 @@ def process_symbol(
     if not signals:
         return
 
-    balance = exchange.fetch_balance()
+    if balance is None:
+        balance = await exchange.fetch_balance()
     if position_manager.hit_daily_loss_limit(balance):
         log_event(logger, "WARN", "Daily loss limit reached", {"balance": balance})
         return
@@ -115,7 +124,7 @@ def process_symbol(
             continue
 
         try:
-            position = execute_trade(
+            position = await execute_trade(
                 exchange,
                 symbol,
                 signal["side"],
@@ -144,79 +153,165 @@ def process_symbol(
             log_event(logger, "ERROR", "Trade execution failed", {"symbol": symbol, "error": str(exc)})
 
 
-def run_live(config: Dict[str, Any], exchange: ExchangeManager, position_manager: PositionManager, logger) -> None:
-    while True:
-        wait_for_next_close()
-        manage_positions(exchange, position_manager, config["symbols"])
-        for symbol in config["symbols"]:
+async def run_live(config: Dict[str, Any], exchange: ExchangeManager, position_manager: PositionManager, logger) -> None:
+    symbols = config["symbols"]
+    semaphore = asyncio.Semaphore(min(len(symbols), config.get("max_workers", 8)))
+
+    async def process_one(symbol: str, balance: float) -> None:
+        async with semaphore:
             try:
-                process_symbol(symbol, config, exchange, position_manager, logger)
+                await process_symbol(symbol, config, exchange, position_manager, logger, balance)
             except Exception as exc:
                 log_event(logger, "ERROR", "Symbol processing failed", {"symbol": symbol, "error": str(exc)})
+
+    # Anchor the first deadline on the wall-clock 4h close, then step it
+    # on the monotonic clock so NTP adjustments can neither double-run
+    # nor skip a bar, and slow cycles don't accumulate drift.
+    next_deadline = time.monotonic() + seconds_until_next_close()
+    while True:
+        await asyncio.sleep(max(0.0, next_deadline - time.monotonic()))
+        next_deadline += CYCLE_INTERVAL_SECONDS
+        await manage_positions(exchange, position_manager, symbols)
+        balance = await exchange.fetch_balance()
+        await asyncio.gather(*(process_one(symbol, balance) for symbol in symbols))
         position_manager.save_state()
 
 
-def run_backtest(config: Dict[str, Any], exchange: ExchangeManager, logger) -> None:
+def backtest_one_symbol(args: Tuple[str, pd.DataFrame, Dict[str, Any]]) -> Dict[str, Any]:
+    symbol, df, config = args
+    df.attrs["symbol"] = symbol
+    df = calculate_macd(df, config.get("macd_fast", 12), config.get("macd_slow", 26), config.get("macd_signal", 9))
+
+    n = len(df)
+    high, low, close = to_arrays(df)
+    macd = df["macd"].to_numpy()
+    signal_line = df["signal"].to_numpy()
+    diff = macd - signal_line
+    require_cross = config.get("macd_recent_crossover", True)
+    lookback = config.get("crossover_lookback", 6)
+
+    # Per-bar "crossover within the last `lookback` bars" flags via a
+    # rolling any over the crossing masks (cumsum-difference trick).
+    cross_up = np.zeros(n, dtype=bool)
+    cross_dn = np.zeros(n, dtype=bool)
+    if n > 1:
+        cross_up[1:] = (diff[:-1] < 0) & (diff[1:] > 0)
+        cross_dn[1:] = (diff[:-1] > 0) & (diff[1:] < 0)
+    recent_up = np.ones(n, dtype=bool)
+    recent_dn = np.ones(n, dtype=bool)
+    if n > lookback:
+        cu = np.cumsum(cross_up)
+        cd = np.cumsum(cross_dn)
+        recent_up[lookback:] = (cu[lookback:] - cu[:-lookback]) > 0
+        recent_dn[lookback:] = (cd[lookback:] - cd[:-lookback]) > 0
+
+    bull_macd_ok = macd > signal_line
+    bear_macd_ok = macd < signal_line
+
+    # One boolean mask per FVG over its live window finds the first
+    # trigger bar without any per-bar Python loop.
+    by_bar: Dict[int, Dict[str, Any]] = {}
+    for fvg in detect_all_fvgs(df):
+        start = max(fvg["detected_idx"], 3)
+        end = min(fvg["expiry_index"], n - 1)
+        mid = fvg["mid"]
+        if fvg["type"] == "bullish":
+            sl = fvg["bottom"]
+            filled = np.flatnonzero(close[start:] <= sl)
+        else:
+            sl = fvg["top"]
+            filled = np.flatnonzero(close[start:] >= sl)
+        if filled.size:
+            # The gap is pruned at the bar its fill prints, so the last
+            # triggerable bar is the one before.
+            end = min(end, start + int(filled[0]) - 1)
+        if end < start:
+            continue
+
+        r = slice(start, end + 1)
+        if fvg["type"] == "bullish":
+            mask = (low[r] <= mid) & (mid <= high[r]) & bull_macd_ok[r] & (close[r] > sl)
+            if require_cross:
+                mask &= recent_up[r]
+        else:
+            mask = (high[r] >= mid) & (mid >= low[r]) & bear_macd_ok[r] & (close[r] < sl)
+            if require_cross:
+                mask &= recent_dn[r]
+
+        hits = np.flatnonzero(mask)
+        if not hits.size:
+            continue
+        trigger_idx = start + int(hits[0])
+        entry = float(close[trigger_idx])
+        risk = abs(entry - sl)
+        tp = entry + 2 * risk if fvg["type"] == "bullish" else entry - 2 * risk
+        # FVGs arrive in ascending detected_idx, so first-wins keeps the
+        # oldest gap's signal for a bar -- the bar-by-bar loop's
+        # signals[-1] over a descending-sorted active list did the same.
+        if trigger_idx not in by_bar:
+            by_bar[trigger_idx] = {
+                "side": "buy" if fvg["type"] == "bullish" else "sell",
+                "entry_price": entry,
+                "sl": sl,
+                "tp": tp,
+            }
+
+    equity = config.get("starting_balance", 10000.0)
+    open_exit_idx: Optional[int] = None
+    open_pnl = 0.0
+    for trigger_idx in sorted(by_bar):
+        if open_exit_idx is not None:
+            if open_exit_idx > trigger_idx:
+                continue
+            equity += open_pnl
+            open_exit_idx = None
+
+        signal = by_bar[trigger_idx]
+        entry = signal["entry_price"]
+        sl = signal["sl"]
+        amount = calculate_position_size(equity, config.get("risk_per_trade", 0.01), entry, sl)
+        if amount <= 0:
+            continue
+
+        remainder = close[trigger_idx + 1 :]
+        if signal["side"] == "buy":
+            exits = np.flatnonzero((remainder <= sl) | (remainder >= signal["tp"]))
+        else:
+            exits = np.flatnonzero((remainder >= sl) | (remainder <= signal["tp"]))
+        if not exits.size:
+            # Position never closes inside the sample; its unrealized
+            # pnl is ignored, same as the bar-by-bar loop.
+            break
+        exit_idx = trigger_idx + 1 + int(exits[0])
+        exit_price = float(close[exit_idx])
+        if signal["side"] == "buy":
+            open_pnl = (exit_price - entry) * amount
+        else:
+            open_pnl = (entry - exit_price) * amount
+        open_exit_idx = exit_idx
+
+    if open_exit_idx is not None:
+        equity += open_pnl
+
+    return {"symbol": symbol, "equity": equity}
+
+
+async def run_backtest(config: Dict[str, Any], exchange: ExchangeManager, logger) -> None:
     timeframe = config.get("timeframe", "4h")
     days = config.get("backtest_days", 90)
     limit = days * 6 + 50
     symbols = config.get("symbols", [])
-    results: List[Dict[str, Any]] = []
 
-    for symbol in symbols:
-        df = fetch_ohlcv_data(exchange, symbol, timeframe, limit)
-        if df.empty:
-            continue
-        df.attrs["symbol"] = symbol
-        df = calculate_macd(df, config.get("macd_fast", 12), config.get("macd_slow", 26), config.get("macd_signal", 9))
-        active: List[Dict[str, Any]] = []
-        balance = config.get("starting_balance", 10000.0)
-        equity = balance
-        open_pos: Dict[str, Any] = {}
-
-        for idx in range(3, len(df)):
-            window = df.iloc[: idx + 1]
-            active = detect_fvg(window, active)
-            signals = check_entry_trigger(
-                window,
-                active,
-                macd_recent_crossover=config.get("macd_recent_crossover", True),
-                crossover_lookback=config.get("crossover_lookback", 6),
-            )
-            if open_pos:
-                price = window["close"].iloc[-1]
-                if open_pos["side"] == "buy":
-                    if price <= open_pos["stop_loss"] or price >= open_pos["take_profit"]:
-                        pnl = (price - open_pos["entry_price"]) * open_pos["amount"]
-                        equity += pnl
-                        open_pos = {}
-                else:
-                    if price >= open_pos["stop_loss"] or price <= open_pos["take_profit"]:
-                        pnl = (open_pos["entry_price"] - price) * open_pos["amount"]
-                        equity += pnl
-                        open_pos = {}
-
-            if open_pos:
-                continue
-            if not signals:
-                continue
-            signal = signals[-1]
-            entry = signal["entry_price"]
-            sl = signal["sl"]
-            amount = calculate_position_size(equity, config.get("risk_per_trade", 0.01), entry, sl)
-            if amount <= 0:
-                continue
-            open_pos = {
-                "side": signal["side"],
-                "entry_price": entry,
-                "stop_loss": sl,
-                "take_profit": signal["tp"],
-                "amount": amount,
-            }
+    dfs = await asyncio.gather(*(fetch_ohlcv_data(exchange, symbol, timeframe, limit) for symbol in symbols))
+    tasks = [(symbol, df, config) for symbol, df in zip(symbols, dfs) if not df.empty]
 
-        results.append({"symbol": symbol, "equity": equity})
-        log_event(logger, "INFO", "Backtest completed", {"symbol": symbol, "equity": equity})
+    results: List[Dict[str, Any]] = []
+    if tasks:
+        with multiprocessing.Pool(min(len(tasks), os.cpu_count() or 1)) as pool:
+            results = pool.map(backtest_one_symbol, tasks)
 
+    for result in results:
+        log_event(logger, "INFO", "Backtest completed", result)
     log_event(logger, "INFO", "Backtest summary", {"results": results})
 
 
@@ -237,10 +332,17 @@ def main() -> None:
     position_manager = PositionManager(config.get("state_file", "state.json"), logger, config.get("daily_loss_limit_pct", 0.05))
     exchange = ExchangeManager(config, logger, position_manager)
 
-    if args.backtest:
-        run_backtest(config, exchange, logger)
-    else:
-        run_live(config, exchange, position_manager, logger)
+    async def run() -> None:
+        await exchange.load_markets()
+        try:
+            if args.backtest:
+                await run_backtest(config, exchange, logger)
+            else:
+                await run_live(config, exchange, position_manager, logger)
+        finally:
+            await exchange.close()
+
+    asyncio.run(run())
 
 
 if __name__ == "__main__":
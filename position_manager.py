@@ -1,7 +1,10 @@
 import json
 import os
+import threading
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Set
+
+import orjson
 
 from logger import log_event
 
@@ -11,11 +14,18 @@ class PositionManager:
         self.state_file = state_file
         self.logger = logger
         self.daily_loss_limit_pct = daily_loss_limit_pct
+        # Guards positions/fvgs/paper_balance when process_symbol runs
+        # across worker threads.
+        self.lock = threading.RLock()
         self.positions: Dict[str, Dict[str, Any]] = {}
         self.fvgs: Dict[str, Any] = {}
         self.paper_balance: float = 0.0
         self.daily: Dict[str, Any] = {"date": "", "start_balance": 0.0}
+        self._last_state_hash: Optional[int] = None
         self.load_state()
+        self._open_set: Set[str] = {
+            symbol for symbol, position in self.positions.items() if position.get("status") == "open"
+        }
 
     def load_state(self) -> None:
         if not os.path.exists(self.state_file):
@@ -31,56 +41,80 @@ class PositionManager:
             log_event(self.logger, "ERROR", "Failed to load state", {"error": str(exc)})
 
     def save_state(self) -> None:
-        payload = {
-            "positions": self.positions,
-            "fvgs": self.fvgs,
-            "paper_balance": self.paper_balance,
-            "daily": self.daily,
-        }
+        with self.lock:
+            payload = {
+                "positions": self.positions,
+                "fvgs": self.fvgs,
+                "paper_balance": self.paper_balance,
+                "daily": self.daily,
+            }
+            try:
+                # OPT_SERIALIZE_NUMPY keeps stray NumPy scalars numeric;
+                # without it they fall through to default=str and come
+                # back from load_state as strings.
+                payload_bytes = orjson.dumps(payload, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+            except Exception as exc:
+                log_event(self.logger, "ERROR", "Failed to persist state", {"error": str(exc)})
+                return
+
+        state_hash = hash(payload_bytes)
+        if state_hash == self._last_state_hash:
+            return
+
+        tmp_path = self.state_file + ".tmp"
         try:
-            with open(self.state_file, "w", encoding="utf-8") as handle:
-                json.dump(payload, handle, indent=2)
+            with open(tmp_path, "wb") as handle:
+                handle.write(payload_bytes)
+            os.replace(tmp_path, self.state_file)
+            self._last_state_hash = state_hash
         except Exception as exc:
             log_event(self.logger, "ERROR", "Failed to persist state", {"error": str(exc)})
 
     def update_fvgs(self, symbol: str, fvgs) -> None:
-        self.fvgs[symbol] = fvgs
+        with self.lock:
+            self.fvgs[symbol] = fvgs
 
     def get_fvgs(self, symbol: str):
         return self.fvgs.get(symbol, [])
 
     def has_open_position(self, symbol: str) -> bool:
-        position = self.positions.get(symbol)
-        return bool(position and position.get("status") == "open")
+        return symbol in self._open_set
 
     def total_open_positions(self) -> int:
-        return sum(1 for pos in self.positions.values() if pos.get("status") == "open")
+        return len(self._open_set)
 
     def open_position(self, symbol: str, data: Dict[str, Any]) -> None:
-        self.positions[symbol] = data
+        with self.lock:
+            self.positions[symbol] = data
+            if data.get("status") == "open":
+                self._open_set.add(symbol)
+            else:
+                self._open_set.discard(symbol)
         log_event(self.logger, "INFO", "Position opened", {"symbol": symbol, **data})
 
     def close_position(self, symbol: str, exit_price: float, reason: str) -> Optional[Dict[str, Any]]:
-        position = self.positions.get(symbol)
-        if not position or position.get("status") != "open":
-            return None
-
-        side = position.get("side")
-        amount = position.get("amount", 0.0)
-        entry_price = position.get("entry_price", 0.0)
-        pnl_per_unit = exit_price - entry_price if side == "buy" else entry_price - exit_price
-        pnl = pnl_per_unit * amount
-        position.update(
-            {
-                "status": "closed",
-                "exit_price": exit_price,
-                "exit_reason": reason,
-                "exit_time": datetime.now(timezone.utc).isoformat(),
-                "pnl": pnl,
-            }
-        )
-        if self.paper_balance is not None:
-            self.paper_balance += pnl
+        with self.lock:
+            position = self.positions.get(symbol)
+            if not position or position.get("status") != "open":
+                return None
+
+            side = position.get("side")
+            amount = position.get("amount", 0.0)
+            entry_price = position.get("entry_price", 0.0)
+            pnl_per_unit = exit_price - entry_price if side == "buy" else entry_price - exit_price
+            pnl = pnl_per_unit * amount
+            position.update(
+                {
+                    "status": "closed",
+                    "exit_price": exit_price,
+                    "exit_reason": reason,
+                    "exit_time": datetime.now(timezone.utc).isoformat(),
+                    "pnl": pnl,
+                }
+            )
+            if self.paper_balance is not None:
+                self.paper_balance += pnl
+            self._open_set.discard(symbol)
         log_event(self.logger, "INFO", "Position closed", position)
         return position
 
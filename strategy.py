@@ -1,93 +1,176 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import asyncio
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from numba import njit
 
 from logger import log_event
 
 
-def fetch_ohlcv_data(exchange, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
-    raw = exchange.fetch_ohlcv(symbol, timeframe, limit)
+async def fetch_ohlcv_data(exchange, symbol: str, timeframe: str, limit: int) -> pd.DataFrame:
+    raw = await exchange.fetch_ohlcv(symbol, timeframe, limit)
     df = pd.DataFrame(raw, columns=["timestamp", "open", "high", "low", "close", "volume"])
     df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms", utc=True)
+    # float32 keeps 5-8 significant digits, plenty for prices, and
+    # halves the bytes the scan kernels walk.
+    for col in ("open", "high", "low", "close"):
+        df[col] = df[col].astype(np.float32)
     return df
 
 
+def to_arrays(df: pd.DataFrame):
+    """Return (high, low, close) NumPy views of the columns the hot kernels read."""
+    return df["high"].to_numpy(), df["low"].to_numpy(), df["close"].to_numpy()
+
+
+@njit(cache=True)
+def _macd_kernel(close, alpha_fast, alpha_slow, alpha_signal):
+    """One-pass fused EWMA chain; matches ewm(span, adjust=False).mean()."""
+    n = close.size
+    ema_fast = np.empty_like(close)
+    ema_slow = np.empty_like(close)
+    macd = np.empty_like(close)
+    signal = np.empty_like(close)
+    hist = np.empty_like(close)
+    if n:
+        ema_fast[0] = close[0]
+        ema_slow[0] = close[0]
+        macd[0] = 0.0
+        signal[0] = 0.0
+        hist[0] = 0.0
+    for i in range(1, n):
+        ema_fast[i] = alpha_fast * close[i] + (1 - alpha_fast) * ema_fast[i - 1]
+        ema_slow[i] = alpha_slow * close[i] + (1 - alpha_slow) * ema_slow[i - 1]
+        macd[i] = ema_fast[i] - ema_slow[i]
+        signal[i] = alpha_signal * macd[i] + (1 - alpha_signal) * signal[i - 1]
+        hist[i] = macd[i] - signal[i]
+    return ema_fast, ema_slow, macd, signal, hist
+
+
 def calculate_macd(df: pd.DataFrame, fast: int = 12, slow: int = 26, signal: int = 9) -> pd.DataFrame:
     df = df.copy()
-    df["ema_fast"] = df["close"].ewm(span=fast, adjust=False).mean()
-    df["ema_slow"] = df["close"].ewm(span=slow, adjust=False).mean()
-    df["macd"] = df["ema_fast"] - df["ema_slow"]
-    df["signal"] = df["macd"].ewm(span=signal, adjust=False).mean()
-    df["hist"] = df["macd"] - df["signal"]
+    close = df["close"].to_numpy()
+    if close.dtype.kind != "f":
+        close = close.astype(np.float64)
+    ema_fast, ema_slow, macd, signal_line, hist = _macd_kernel(
+        close, 2.0 / (fast + 1), 2.0 / (slow + 1), 2.0 / (signal + 1)
+    )
+    df["ema_fast"] = ema_fast
+    df["ema_slow"] = ema_slow
+    df["macd"] = macd
+    df["signal"] = signal_line
+    df["hist"] = hist
     return df
 
 
-def _fvg_filled(df: pd.DataFrame, fvg: Dict[str, Any]) -> bool:
-    last_close = df["close"].iloc[-1]
-    if fvg["type"] == "bullish":
-        return last_close <= fvg["bottom"]
-    return last_close >= fvg["top"]
+@njit(cache=True, fastmath=True)
+def _fvg_scan_numba(high, low):
+    """Scan for three-candle gaps; returns parallel arrays (type_codes, tops, bottoms, detected_idx).
+
+    Type codes: 1 = bullish, -1 = bearish.
+    """
+    n = high.size
+    type_codes = np.empty(n, np.int8)
+    tops = np.empty(n, np.float64)
+    bottoms = np.empty(n, np.float64)
+    detected = np.empty(n, np.int64)
+    count = 0
+    for idx in range(2, n):
+        if low[idx] > high[idx - 2]:
+            type_codes[count] = 1
+            tops[count] = low[idx]
+            bottoms[count] = high[idx - 2]
+            detected[count] = idx
+            count += 1
+        elif high[idx] < low[idx - 2]:
+            type_codes[count] = -1
+            tops[count] = high[idx - 2]
+            bottoms[count] = low[idx]
+            detected[count] = idx
+            count += 1
+    return type_codes[:count], tops[:count], bottoms[:count], detected[:count]
+
+
+@njit(cache=True, fastmath=True)
+def _crossover_scan_numba(macd, signal, lookback):
+    """Single pass over the lookback window; returns (bullish_cross, bearish_cross)."""
+    n = macd.size
+    bull = False
+    bear = False
+    start = n - lookback - 1
+    d_prev = macd[start] - signal[start]
+    for i in range(start + 1, n):
+        d_cur = macd[i] - signal[i]
+        if d_prev < 0 and d_cur > 0:
+            bull = True
+        elif d_prev > 0 and d_cur < 0:
+            bear = True
+        d_prev = d_cur
+    return bull, bear
+
+
+def _build_fvg(df: pd.DataFrame, fvg_type: str, top: float, bottom: float, idx: int) -> Dict[str, Any]:
+    return {
+        "type": fvg_type,
+        "top": top,
+        "bottom": bottom,
+        "mid": (top + bottom) / 2,
+        "candle1_idx": idx - 2,
+        "detected_idx": idx,
+        "expiry_index": idx + 20,
+        "detected_at": df["timestamp"].iloc[idx].isoformat(),
+    }
 
 
 def detect_fvg(df: pd.DataFrame, existing_fvgs: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
-    active: List[Dict[str, Any]] = []
+    active: deque = deque()
     last_idx = len(df) - 1
 
-    for fvg in existing_fvgs or []:
-        if fvg.get("expiry_index", 0) >= last_idx and not _fvg_filled(df, fvg):
-            active.append(fvg)
-
-    for idx in range(2, len(df)):
-        c1 = df.iloc[idx - 2]
-        c3 = df.iloc[idx]
-        fvg_type: Optional[str] = None
-        top: Optional[float] = None
-        bottom: Optional[float] = None
-
-        if c3["low"] > c1["high"]:
-            fvg_type = "bullish"
-            top = float(c3["low"])
-            bottom = float(c1["high"])
-        elif c3["high"] < c1["low"]:
-            fvg_type = "bearish"
-            top = float(c1["high"])
-            bottom = float(c3["low"])
-
-        if fvg_type is None:
-            continue
-
-        fvg = {
-            "type": fvg_type,
-            "top": top,
-            "bottom": bottom,
-            "mid": (top + bottom) / 2,
-            "candle1_idx": idx - 2,
-            "detected_idx": idx,
-            "expiry_index": idx + 20,
-            "detected_at": df["timestamp"].iloc[idx].isoformat(),
-        }
-        active.append(fvg)
-        active = sorted(active, key=lambda x: x.get("detected_idx", 0), reverse=True)[:3]
-
-    return active
-
-
-def _recent_crossover(df: pd.DataFrame, lookback: int, direction: str) -> bool:
+    if existing_fvgs:
+        # One scalar read covers the fill check for every carried gap.
+        last_close = float(df["close"].iat[-1])
+        for fvg in existing_fvgs:
+            if fvg.get("expiry_index", 0) < last_idx:
+                continue
+            filled = (
+                last_close <= fvg["bottom"] if fvg["type"] == "bullish" else last_close >= fvg["top"]
+            )
+            if not filled:
+                active.append(fvg)
+
+    high, low, _ = to_arrays(df)
+    type_codes, tops, bottoms, detected = _fvg_scan_numba(high, low)
+    # The scan yields gaps in ascending detected_idx, so capping is
+    # just dropping the oldest entry -- no sort needed.
+    for k in range(detected.size):
+        fvg_type = "bullish" if type_codes[k] == 1 else "bearish"
+        active.append(_build_fvg(df, fvg_type, float(tops[k]), float(bottoms[k]), int(detected[k])))
+        if len(active) > 3:
+            active.popleft()
+
+    return list(active)
+
+
+def detect_all_fvgs(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Return every FVG in the series in chronological order, without expiry or fill pruning."""
+    high, low, _ = to_arrays(df)
+    type_codes, tops, bottoms, detected = _fvg_scan_numba(high, low)
+    fvgs: List[Dict[str, Any]] = []
+    for k in range(detected.size):
+        fvg_type = "bullish" if type_codes[k] == 1 else "bearish"
+        fvgs.append(_build_fvg(df, fvg_type, float(tops[k]), float(bottoms[k]), int(detected[k])))
+    return fvgs
+
+
+def _recent_crossovers(df: pd.DataFrame, lookback: int) -> Tuple[bool, bool]:
     if len(df) < lookback + 1:
-        return True
-    macd = df["macd"].iloc[-lookback - 1 :]
-    signal = df["signal"].iloc[-lookback - 1 :]
-    diff = macd - signal
-    signs = np.sign(diff)
-    for i in range(1, len(signs)):
-        if signs.iloc[i - 1] < 0 < signs.iloc[i] and direction == "bullish":
-            return True
-        if signs.iloc[i - 1] > 0 > signs.iloc[i] and direction == "bearish":
-            return True
-    return False
+        return True, True
+    bull, bear = _crossover_scan_numba(df["macd"].to_numpy(), df["signal"].to_numpy(), lookback)
+    return bool(bull), bool(bear)
 
 
 def check_entry_trigger(
@@ -101,30 +184,42 @@ def check_entry_trigger(
         return signals
 
     trigger_idx = len(df) - 1
-    trigger_row = df.iloc[trigger_idx]
+    # float() matters here: with float32 columns the .iat scalars are
+    # np.float32, which is not a float subclass, and raw NumPy scalars
+    # must not leak into signals or persisted positions.
+    row_low = float(df["low"].iat[-1])
+    row_high = float(df["high"].iat[-1])
+    row_close = float(df["close"].iat[-1])
+    row_macd = float(df["macd"].iat[-1])
+    row_signal = float(df["signal"].iat[-1])
+    trigger_time = df["timestamp"].iat[-1].isoformat()
+
+    bull_cross = bear_cross = True
+    if macd_recent_crossover:
+        bull_cross, bear_cross = _recent_crossovers(df, crossover_lookback)
 
     for fvg in fvg_list:
         if fvg.get("expiry_index", 0) < trigger_idx:
             continue
 
         if fvg["type"] == "bullish":
-            touched = trigger_row["low"] <= fvg["mid"] <= trigger_row["high"]
-            macd_ok = trigger_row["macd"] > trigger_row["signal"]
+            touched = row_low <= fvg["mid"] <= row_high
+            macd_ok = row_macd > row_signal
             direction = "bullish"
             sl = fvg["bottom"]
         else:
-            touched = trigger_row["high"] >= fvg["mid"] >= trigger_row["low"]
-            macd_ok = trigger_row["macd"] < trigger_row["signal"]
+            touched = row_high >= fvg["mid"] >= row_low
+            macd_ok = row_macd < row_signal
             direction = "bearish"
             sl = fvg["top"]
 
         if not touched or not macd_ok:
             continue
 
-        if macd_recent_crossover and not _recent_crossover(df, crossover_lookback, direction):
+        if macd_recent_crossover and not (bull_cross if direction == "bullish" else bear_cross):
             continue
 
-        entry_price = float(trigger_row["close"])
+        entry_price = row_close
         if direction == "bullish" and sl >= entry_price:
             continue
         if direction == "bearish" and sl <= entry_price:
@@ -143,9 +238,9 @@ def check_entry_trigger(
                 "sl": sl,
                 "tp": tp,
                 "fvg": fvg,
-                "trigger_time": trigger_row["timestamp"].isoformat(),
-                "macd": float(trigger_row["macd"]),
-                "signal_line": float(trigger_row["signal"]),
+                "trigger_time": trigger_time,
+                "macd": row_macd,
+                "signal_line": row_signal,
             }
         )
 
@@ -162,7 +257,7 @@ def calculate_position_size(balance: float, risk_pct: float, entry: float, sl: f
     return risk_amount / unit_risk
 
 
-def execute_trade(
+async def execute_trade(
     exchange,
     symbol: str,
     side: str,
@@ -172,10 +267,53 @@ def execute_trade(
     paper: bool,
     position_manager=None,
 ):
-    entry_order = exchange.create_market_order(symbol, side, amount)
     opp_side = "sell" if side == "buy" else "buy"
-    sl_order = exchange.create_stop_order(symbol, opp_side, amount, sl)
-    tp_order = exchange.create_take_profit_order(symbol, opp_side, amount, tp)
+    if exchange.supports_bracket_orders():
+        # One round trip covers entry, stop and take-profit.
+        entry_order = await exchange.create_bracket_order(symbol, side, amount, sl, tp)
+        order_ids = {
+            "entry": entry_order.get("id"),
+            "sl": entry_order.get("id"),
+            "tp": entry_order.get("id"),
+        }
+    else:
+        # The SL/TP submissions only need the amount, not the entry's
+        # id, so all three can go out concurrently.
+        entry_order, sl_order, tp_order = await asyncio.gather(
+            exchange.create_market_order(symbol, side, amount),
+            exchange.create_stop_order(symbol, opp_side, amount, sl),
+            exchange.create_take_profit_order(symbol, opp_side, amount, tp),
+            return_exceptions=True,
+        )
+        failures = [o for o in (entry_order, sl_order, tp_order) if isinstance(o, BaseException)]
+        if failures:
+            if isinstance(entry_order, BaseException):
+                # Entry never landed: clear any resting SL/TP so no
+                # protective order sits on the book without a position.
+                for order in (sl_order, tp_order):
+                    if not isinstance(order, BaseException):
+                        await exchange.cancel_order(order.get("id"), symbol)
+            else:
+                # Entry filled but a protective leg failed: flatten the
+                # position with an offsetting market order rather than
+                # leave it live and unrecorded. Only clear the surviving
+                # protective leg once flat -- if the close itself fails,
+                # keep the resting leg as the position's last protection.
+                flattened = True
+                try:
+                    await exchange.create_market_order(symbol, opp_side, amount)
+                except Exception:
+                    flattened = False
+                if flattened:
+                    for order in (sl_order, tp_order):
+                        if not isinstance(order, BaseException):
+                            await exchange.cancel_order(order.get("id"), symbol)
+            raise failures[0]
+        order_ids = {
+            "entry": entry_order.get("id"),
+            "sl": sl_order.get("id"),
+            "tp": tp_order.get("id"),
+        }
 
     position_payload = {
         "symbol": symbol,
@@ -186,11 +324,7 @@ def execute_trade(
         "take_profit": tp,
         "status": "open",
         "entry_time": pd.Timestamp.utcnow().isoformat(),
-        "order_ids": {
-            "entry": entry_order.get("id"),
-            "sl": sl_order.get("id"),
-            "tp": tp_order.get("id"),
-        },
+        "order_ids": order_ids,
     }
 
     if position_manager is not None:
@@ -199,11 +333,15 @@ def execute_trade(
     return position_payload
 
 
-def manage_positions(exchange, position_manager, symbols: List[str]) -> None:
-    for symbol in symbols:
-        if not position_manager.has_open_position(symbol):
-            continue
-        price = exchange.fetch_price(symbol)
+async def manage_positions(exchange, position_manager, symbols: List[str]) -> None:
+    open_symbols = [s for s in symbols if position_manager.has_open_position(s)]
+    if not open_symbols:
+        return
+
+    tickers = await exchange.fetch_tickers(open_symbols)
+    for symbol in open_symbols:
+        ticker = tickers.get(symbol)
+        price = (ticker.get("last") or ticker.get("close")) if ticker else None
         if price is None:
             continue
         position = position_manager.positions.get(symbol, {})
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+from main import backtest_one_symbol
+from strategy import detect_all_fvgs
+
+
+def _ohlcv_frame(rows):
+    df = pd.DataFrame(rows, columns=["open", "high", "low", "close"])
+    df.insert(0, "timestamp", pd.date_range("2023-01-01", periods=len(df), freq="4H"))
+    df["volume"] = 100
+    for col in ("open", "high", "low", "close"):
+        df[col] = df[col].astype(np.float32)
+    return df
+
+
+def _bracket_scenario():
+    # Flat bars 0-9, then a gap up forming a bullish FVG at idx 11
+    # (bottom=high[9]=101, top=low[11]=106, mid=103.5), a mid-touch
+    # trigger at idx 13 (close 106), and a take-profit print at idx 15
+    # (close 117 >= tp 116).
+    rows = [[100, 101, 99, 100]] * 10
+    rows += [
+        [101, 108, 100, 105],  # 10: run-up
+        [106, 110, 106, 108],  # 11: gap bar, low > high[9]
+        [108, 111, 107, 110],  # 12: stays above the mid
+        [106, 107, 103, 106],  # 13: dips into the mid, closes above sl
+        [106, 108, 105, 107],  # 14: neither sl nor tp
+        [110, 118, 110, 117],  # 15: tp hit
+        [117, 119, 116, 118],
+        [117, 119, 116, 118],
+        [117, 119, 116, 118],
+    ]
+    return _ohlcv_frame(rows)
+
+
+def test_backtest_one_symbol_single_bracket_trade():
+    df = _bracket_scenario()
+    fvgs = detect_all_fvgs(df)
+    assert any(f["type"] == "bullish" and f["detected_idx"] == 11 for f in fvgs)
+
+    config = {
+        "macd_recent_crossover": False,
+        "starting_balance": 10000.0,
+        "risk_per_trade": 0.01,
+    }
+    result = backtest_one_symbol(("BTC/USDT", df, config))
+
+    # entry 106, sl 101 -> amount = 100/5 = 20; exit at close[15]=117
+    # (tp 116), pnl = 11 * 20 = 220.
+    assert result["symbol"] == "BTC/USDT"
+    assert abs(result["equity"] - 10220.0) < 1e-6
+
+
+def test_backtest_one_symbol_no_signals_keeps_balance():
+    rows = [[100, 101, 99, 100]] * 40
+    df = _ohlcv_frame(rows)
+    result = backtest_one_symbol(("BTC/USDT", df, {"starting_balance": 10000.0}))
+    assert result["equity"] == 10000.0
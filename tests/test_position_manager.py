@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+
+from logger import setup_logging
+from position_manager import PositionManager
+
+
+def test_state_roundtrip_keeps_numbers_numeric(tmp_path):
+    logger = setup_logging()
+    state_file = str(tmp_path / "state.json")
+
+    pm = PositionManager(state_file, logger)
+    pm.paper_balance = np.float32(9950.0)
+    pm.open_position(
+        "BTC/USDT",
+        {
+            "symbol": "BTC/USDT",
+            "side": "buy",
+            "amount": np.float32(64.51632),
+            "entry_price": 106.0,
+            "stop_loss": 101.0,
+            "take_profit": np.float32(119.54999),
+            "status": "open",
+        },
+    )
+    pm.save_state()
+
+    reloaded = PositionManager(state_file, logger)
+    position = reloaded.positions["BTC/USDT"]
+    assert isinstance(reloaded.paper_balance, float)
+    for key in ("amount", "take_profit", "stop_loss"):
+        assert isinstance(position[key], float), key
+    # Exit management compares these against live prices after restart.
+    assert position["take_profit"] >= 119.0
+    assert reloaded.has_open_position("BTC/USDT")
+
+
+def test_save_state_skips_unchanged_payload(tmp_path):
+    logger = setup_logging()
+    state_file = str(tmp_path / "state.json")
+
+    pm = PositionManager(state_file, logger)
+    pm.paper_balance = 5000.0
+    pm.save_state()
+    mtime = os.stat(state_file).st_mtime_ns
+    pm.save_state()
+    assert os.stat(state_file).st_mtime_ns == mtime